@@ -53,11 +53,12 @@ async def main(args):
     if network not in NETWORK_URLS:
         raise ValueError(f"Unsupported network: {network}")
     
-    files: List[Dict[str, Any]] = []
-    for file_path in args.files:
-        with open(file_path, 'rb') as f:
-            content = f.read()
-        files.append({"name": os.path.basename(file_path), "content": content})
+    # pass paths so upload_files can read each file in chunks instead of
+    # holding every file's full content in memory at once
+    files: List[Dict[str, Any]] = [
+        {"name": os.path.basename(file_path), "path": file_path}
+        for file_path in args.files
+    ]
     
     root_cid = await upload_files(files, options)
     print(f"Uploaded files with root CID: {root_cid}")
@@ -1,34 +1,57 @@
+import asyncio
+import base64
 import hashlib
 from typing import Dict, Any, Tuple, List
-from multibase import encode as multibase_encode, decode as multibase_decode
+from multibase import decode as multibase_decode
 
 # Constants
 CODEC_RAW = 0x55
 CODEC_DAG_PB = 0x70
+CHUNK_SIZE = 256 * 1024  # canonical IPFS chunk size
+
+def chunk_file(content: bytes, size: int = CHUNK_SIZE):
+    for offset in range(0, len(content), size):
+        yield content[offset:offset + size]
 
 def compute_hash(data: bytes) -> bytes:
     return hashlib.sha256(data).digest()
 
 def cid_to_string(cid: bytes) -> str:
-    return multibase_encode('base32', cid).decode()
+    # 'b' is the multibase prefix for lowercase unpadded base32;
+    # stdlib b32encode is C code, much faster than the multibase package
+    return 'b' + base64.b32encode(cid).decode('ascii').lower().rstrip('=')
 
 def string_to_cid(string: str) -> bytes:
     return multibase_decode(string)
 
+# precomputed v1/SHA-256 headers for the two codecs every call site uses
+_CID_HEADER_RAW = bytes([1, CODEC_RAW, 0x12, 32])
+_CID_HEADER_DAG_PB = bytes([1, CODEC_DAG_PB, 0x12, 32])
+
 def pack_cid(cid_data: Dict[str, Any]) -> bytes:
     version = cid_data.get('version', 1)
     codec = cid_data.get('codec', CODEC_RAW)
     hash_type = cid_data.get('hashType', 0x12)
     hash_ = cid_data['hash']
-    
+
     if version == 0:
         return b'\x12\x20' + hash_
-    
+
+    if version == 1 and hash_type == 0x12 and len(hash_) == 32:
+        if codec == CODEC_RAW:
+            return _CID_HEADER_RAW + hash_
+        if codec == CODEC_DAG_PB:
+            return _CID_HEADER_DAG_PB + hash_
+
     return bytes([version, codec, hash_type, len(hash_)]) + hash_
 
 def read_varint(data: bytes, offset: int) -> Tuple[int, int]:
-    value = 0
-    shift = 0
+    byte = data[offset]
+    offset += 1
+    if byte < 0x80:  # single byte covers field tags and most lengths
+        return byte, offset
+    value = byte & 0x7f
+    shift = 7
     while True:
         byte = data[offset]
         offset += 1
@@ -37,79 +60,128 @@ def read_varint(data: bytes, offset: int) -> Tuple[int, int]:
             return value, offset
         shift += 7
 
+_SINGLE_BYTE_VARINTS = [bytes([i]) for i in range(0x80)]
+
 def write_varint(value: int) -> bytes:
+    if value < 0x80:
+        return _SINGLE_BYTE_VARINTS[value]
     buffer = bytearray()
-    while True:
-        byte = value & 0x7f
+    while value >= 0x80:
+        buffer.append((value & 0x7f) | 0x80)
         value >>= 7
-        if value == 0:
-            buffer.append(byte)
-            return bytes(buffer)
-        buffer.append(byte | 0x80)
+    buffer.append(value)
+    return bytes(buffer)
 
-def read_proto(data: bytes, process_field):
+def read_pb_link(data: bytes, offset: int = 0, end: int = None) -> Dict[str, Any]:
+    if end is None:
+        end = len(data)
     result = {}
-    offset = 0
-    while offset < len(data):
+    while offset < end:
         field_tag, offset = read_varint(data, offset)
         field_number = field_tag >> 3
         wire_type = field_tag & 0x7
         if wire_type == 0:  # Varint
             value, offset = read_varint(data, offset)
+            if field_number == 3:
+                result['size'] = value
         elif wire_type == 1:  # 64-bit
-            value = int.from_bytes(data[offset:offset+8], 'little')
             offset += 8
         elif wire_type == 2:  # Length-delimited
             length, offset = read_varint(data, offset)
-            value = data[offset:offset+length]
+            if field_number == 1:
+                result['cid'] = data[offset:offset + length]
+            elif field_number == 2:
+                result['name'] = data[offset:offset + length].decode('utf-8')
             offset += length
         else:
             raise ValueError(f"Unsupported wire type: {wire_type}")
-        process_field(field_number, value, result)
     return result
 
-def read_pb_link(data: bytes) -> Dict[str, Any]:
-    def process_field(field_number, value, result):
-        if field_number == 1:
-            result['cid'] = value
-        elif field_number == 2:
-            result['name'] = value.decode('utf-8')
-        elif field_number == 3:
-            result['size'] = value
-    return read_proto(data, process_field)
-
 def read_pb_node(data: bytes) -> Dict[str, Any]:
-    def process_field(field_number, value, result):
-        if field_number == 1:
-            result['data'] = value
-        elif field_number == 2:
-            result.setdefault('links', []).append(read_pb_link(value))
-    return read_proto(data, process_field)
+    result = {}
+    offset = 0
+    end = len(data)
+    while offset < end:
+        field_tag, offset = read_varint(data, offset)
+        field_number = field_tag >> 3
+        wire_type = field_tag & 0x7
+        if wire_type == 0:  # Varint
+            _, offset = read_varint(data, offset)
+        elif wire_type == 1:  # 64-bit
+            offset += 8
+        elif wire_type == 2:  # Length-delimited
+            length, offset = read_varint(data, offset)
+            if field_number == 1:
+                result['data'] = data[offset:offset + length]
+            elif field_number == 2:
+                # parse the link in place instead of slicing it out first
+                result.setdefault('links', []).append(read_pb_link(data, offset, offset + length))
+            offset += length
+        else:
+            raise ValueError(f"Unsupported wire type: {wire_type}")
+    return result
+
+# wire tags are constant, no need to re-encode them per field
+_TAG_NODE_DATA = write_varint((1 << 3) | 2)
+_TAG_NODE_LINK = write_varint((2 << 3) | 2)
+_TAG_LINK_CID = write_varint((1 << 3) | 2)
+_TAG_LINK_NAME = write_varint((2 << 3) | 2)
+_TAG_LINK_SIZE = write_varint((3 << 3) | 0)
 
 def write_pb_node(node: Dict[str, Any]) -> bytes:
     def write_pb_link(link):
         return (
-            write_varint((1 << 3) | 2) + write_varint(len(link['cid'])) + link['cid'] +
-            write_varint((2 << 3) | 2) + write_varint(len(link['name'])) + link['name'].encode('utf-8') +
-            write_varint((3 << 3) | 0) + write_varint(link['size'])
+            _TAG_LINK_CID + write_varint(len(link['cid'])) + link['cid'] +
+            _TAG_LINK_NAME + write_varint(len(link['name'])) + link['name'].encode('utf-8') +
+            _TAG_LINK_SIZE + write_varint(link['size'])
         )
 
-    result = b''
+    result = bytearray()
     for link in node.get('links', []):
-        result += write_varint((2 << 3) | 2) + write_varint(len(write_pb_link(link))) + write_pb_link(link)
+        payload = write_pb_link(link)
+        result += _TAG_NODE_LINK + write_varint(len(payload))
+        result += payload
     if 'data' in node:
-        result += write_varint((1 << 3) | 2) + write_varint(len(node['data'])) + node['data']
-    return result
+        result += _TAG_NODE_DATA + write_varint(len(node['data']))
+        result += node['data']
+    return bytes(result)
 
 def read_unixfs_data(data: bytes) -> Dict[str, Any]:
-    def process_field(field_number, value, result):
-        if field_number == 1:
-            result['type'] = value
-        elif field_number == 2:
-            result['data'] = value
-        elif field_number == 3:
-            result['fileSize'] = value
-    return read_proto(data, process_field)
+    result = {}
+    offset = 0
+    end = len(data)
+    while offset < end:
+        field_tag, offset = read_varint(data, offset)
+        field_number = field_tag >> 3
+        wire_type = field_tag & 0x7
+        if wire_type == 0:  # Varint
+            value, offset = read_varint(data, offset)
+            if field_number == 1:
+                result['type'] = value
+            elif field_number == 3:
+                result['fileSize'] = value
+            elif field_number == 4:
+                result.setdefault('blockSizes', []).append(value)
+        elif wire_type == 1:  # 64-bit
+            offset += 8
+        elif wire_type == 2:  # Length-delimited
+            length, offset = read_varint(data, offset)
+            if field_number == 2:
+                result['data'] = data[offset:offset + length]
+            offset += length
+        else:
+            raise ValueError(f"Unsupported wire type: {wire_type}")
+    return result
+
+def write_unixfs_data(unixfs: Dict[str, Any]) -> bytes:
+    result = write_varint((1 << 3) | 0) + write_varint(unixfs['type'])
+    if 'data' in unixfs:
+        result += write_varint((2 << 3) | 2) + write_varint(len(unixfs['data'])) + unixfs['data']
+    if 'fileSize' in unixfs:
+        result += write_varint((3 << 3) | 0) + write_varint(unixfs['fileSize'])
+    for block_size in unixfs.get('blockSizes', []):
+        result += write_varint((4 << 3) | 0) + write_varint(block_size)
+    return result
 
 def read_cid(data: bytes) -> Dict[str, Any]:
     if data[0] == 0x12 and data[1] == 0x20:
@@ -117,7 +189,7 @@ def read_cid(data: bytes) -> Dict[str, Any]:
             'version': 0,
             'codec': CODEC_DAG_PB,
             'hashType': 0x12,
-            'hash': data[2:34]
+            'hash': bytes(data[2:34])
         }
     
     version = data[0]
@@ -133,21 +205,33 @@ def read_cid(data: bytes) -> Dict[str, Any]:
     if hash_size != 32:
         raise ValueError("Wrong SHA-256 hash size")
     
-    hash_ = data[4:36]
+    hash_ = bytes(data[4:36])
     return {'version': version, 'codec': codec, 'hashType': hash_type, 'hash': hash_}
 
 def validate_block(cid: bytes, block_data: bytes):
+    # block_data may be a memoryview (e.g. a read_car slice) — hashlib
+    # digests it without a copy
     cid_data = read_cid(cid)
     computed_hash = hashlib.sha256(block_data).digest()
     if cid_data['hash'] != computed_hash:
         raise ValueError("Hash mismatch")
 
+async def validate_blocks(blocks: List[Dict[str, Any]]):
+    # hashlib releases the GIL, so validating in a thread pool runs the
+    # SHA-256 work across cores
+    await asyncio.gather(*(
+        asyncio.to_thread(validate_block, block['cid'], block['data'])
+        for block in blocks
+    ))
+
 def read_car(file_data: bytes) -> List[Dict[str, Any]]:
     blocks = []
     offset = 0
+    # slicing the memoryview yields zero-copy views instead of bytes copies
+    mv = memoryview(file_data)
     while offset < len(file_data):
         block_length, data_offset = read_varint(file_data, offset)
-        data = file_data[data_offset:data_offset + block_length]
+        data = mv[data_offset:data_offset + block_length]
         blocks.append({
             'blockLength': block_length,
             'data': data,
@@ -156,6 +240,17 @@ def read_car(file_data: bytes) -> List[Dict[str, Any]]:
         offset = data_offset + block_length
     return blocks
 
+# prefer the compiled versions when the optional extension is built
+# (python setup.py build_ext --inplace); the definitions above are the
+# pure-Python fallback
+try:
+    from ipfs_helpers_fast import (  # noqa: F811
+        read_varint, write_varint, read_pb_link, read_pb_node,
+        read_unixfs_data, write_pb_node,
+    )
+except ImportError:
+    pass
+
 def read_block(data: bytes) -> Dict[str, Any]:
     cid_data = read_cid(data)
     cid = pack_cid(cid_data)
@@ -165,7 +260,8 @@ def read_block(data: bytes) -> Dict[str, Any]:
         return {'cid': cid, 'codec': CODEC_RAW, 'data': block_data}
     elif cid_data['codec'] == CODEC_DAG_PB:
         try:
-            node = read_pb_node(block_data)
+            # pb nodes are small; copy so field slices come out as bytes
+            node = read_pb_node(bytes(block_data))
             return {'cid': cid, 'codec': CODEC_DAG_PB, 'data': block_data, 'node': node}
         except Exception as e:
             raise ValueError(f"Error reading PBNode: {str(e)}")
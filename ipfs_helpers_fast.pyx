@@ -0,0 +1,144 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+# Optional compiled implementations of the hot protobuf helpers from
+# ipfs_helpers.py. Build with: python setup.py build_ext --inplace
+# ipfs_helpers falls back to the pure-Python versions when this module
+# is not built.
+from cpython.bytes cimport PyBytes_FromStringAndSize
+
+cdef inline unsigned long long _read_varint(const unsigned char[:] buf, Py_ssize_t* offset) except? 0:
+    cdef unsigned long long value
+    cdef unsigned int shift
+    cdef unsigned char byte
+    cdef Py_ssize_t pos = offset[0]
+    byte = buf[pos]
+    pos += 1
+    if byte < 0x80:
+        offset[0] = pos
+        return byte
+    value = byte & 0x7f
+    shift = 7
+    while True:
+        byte = buf[pos]
+        pos += 1
+        value |= (<unsigned long long>(byte & 0x7f)) << shift
+        if byte < 0x80:
+            offset[0] = pos
+            return value
+        shift += 7
+
+def read_varint(data, offset):
+    cdef const unsigned char[:] buf = data
+    cdef Py_ssize_t pos = offset
+    cdef unsigned long long value = _read_varint(buf, &pos)
+    return value, pos
+
+def write_varint(value):
+    cdef unsigned long long v = value
+    cdef unsigned char out[10]
+    cdef int i = 0
+    while v >= 0x80:
+        out[i] = <unsigned char>((v & 0x7f) | 0x80)
+        v >>= 7
+        i += 1
+    out[i] = <unsigned char>v
+    return PyBytes_FromStringAndSize(<char*>out, i + 1)
+
+def read_pb_link(data, offset=0, end=None):
+    cdef const unsigned char[:] buf = data
+    cdef Py_ssize_t pos = offset
+    cdef Py_ssize_t stop = len(data) if end is None else end
+    cdef unsigned long long field_tag, value, length
+    result = {}
+    while pos < stop:
+        field_tag = _read_varint(buf, &pos)
+        wire_type = field_tag & 0x7
+        field_number = field_tag >> 3
+        if wire_type == 0:  # Varint
+            value = _read_varint(buf, &pos)
+            if field_number == 3:
+                result['size'] = value
+        elif wire_type == 1:  # 64-bit
+            pos += 8
+        elif wire_type == 2:  # Length-delimited
+            length = _read_varint(buf, &pos)
+            if field_number == 1:
+                result['cid'] = data[pos:pos + length]
+            elif field_number == 2:
+                result['name'] = data[pos:pos + length].decode('utf-8')
+            pos += length
+        else:
+            raise ValueError(f"Unsupported wire type: {wire_type}")
+    return result
+
+def read_pb_node(data):
+    cdef const unsigned char[:] buf = data
+    cdef Py_ssize_t pos = 0
+    cdef Py_ssize_t stop = len(data)
+    cdef unsigned long long field_tag, length
+    result = {}
+    while pos < stop:
+        field_tag = _read_varint(buf, &pos)
+        wire_type = field_tag & 0x7
+        field_number = field_tag >> 3
+        if wire_type == 0:  # Varint
+            _read_varint(buf, &pos)
+        elif wire_type == 1:  # 64-bit
+            pos += 8
+        elif wire_type == 2:  # Length-delimited
+            length = _read_varint(buf, &pos)
+            if field_number == 1:
+                result['data'] = data[pos:pos + length]
+            elif field_number == 2:
+                result.setdefault('links', []).append(read_pb_link(data, pos, pos + length))
+            pos += length
+        else:
+            raise ValueError(f"Unsupported wire type: {wire_type}")
+    return result
+
+def read_unixfs_data(data):
+    cdef const unsigned char[:] buf = data
+    cdef Py_ssize_t pos = 0
+    cdef Py_ssize_t stop = len(data)
+    cdef unsigned long long field_tag, value, length
+    result = {}
+    while pos < stop:
+        field_tag = _read_varint(buf, &pos)
+        wire_type = field_tag & 0x7
+        field_number = field_tag >> 3
+        if wire_type == 0:  # Varint
+            value = _read_varint(buf, &pos)
+            if field_number == 1:
+                result['type'] = value
+            elif field_number == 3:
+                result['fileSize'] = value
+            elif field_number == 4:
+                result.setdefault('blockSizes', []).append(value)
+        elif wire_type == 1:  # 64-bit
+            pos += 8
+        elif wire_type == 2:  # Length-delimited
+            length = _read_varint(buf, &pos)
+            if field_number == 2:
+                result['data'] = data[pos:pos + length]
+            pos += length
+        else:
+            raise ValueError(f"Unsupported wire type: {wire_type}")
+    return result
+
+def write_pb_node(node):
+    cdef bytearray result = bytearray()
+    cdef bytearray payload
+    for link in node.get('links', []):
+        payload = bytearray()
+        cid = link['cid']
+        payload += write_varint((1 << 3) | 2) + write_varint(len(cid))
+        payload += cid
+        name = link['name'].encode('utf-8')
+        payload += write_varint((2 << 3) | 2) + write_varint(len(name))
+        payload += name
+        payload += write_varint((3 << 3) | 0) + write_varint(link['size'])
+        result += write_varint((2 << 3) | 2) + write_varint(len(payload))
+        result += payload
+    if 'data' in node:
+        result += write_varint((1 << 3) | 2) + write_varint(len(node['data']))
+        result += node['data']
+    return bytes(result)
@@ -1,14 +1,19 @@
 import asyncio
 import aiohttp
+import contextlib
 import os
+import types
 from typing import List, Dict, Any
 from py_near.account import Account
 from py_near.transactions import create_function_call_action
 from ipfs_helpers import (
-    compute_hash, cid_to_string, pack_cid, write_pb_node, read_cid
+    compute_hash, cid_to_string, pack_cid, write_pb_node, write_unixfs_data,
+    chunk_file, read_cid, CHUNK_SIZE
 )
 
-DEFAULT_OPTIONS = {
+# read-only view so a caller can't mutate the shared defaults in place;
+# build custom options with {**DEFAULT_OPTIONS, ...}
+DEFAULT_OPTIONS = types.MappingProxyType({
     "log": print,
     "status_callback": lambda current_blocks, total_blocks: None,
     "timeout": 2.5,
@@ -20,92 +25,144 @@ DEFAULT_OPTIONS = {
     "account_id": None,
     "private_key": None,
     "network_id": "mainnet",
-}
+    # fs_store is idempotent, so probing the gateway for existing blocks
+    # only pays off when re-uploading mostly-unchanged content
+    "skip_existing": False,
+    # per-block logging is a syscall per block — opt in for debugging
+    "verbose": False,
+})
 
-async def is_already_uploaded(cid: bytes, account: Account, options: Dict[str, Any] = DEFAULT_OPTIONS) -> bool:
+async def is_already_uploaded(cid32: str, session: aiohttp.ClientSession, options: Dict[str, Any] = DEFAULT_OPTIONS) -> bool:
     log, timeout, retry_count = options["log"], options["timeout"], options["retry_count"]
     gateway_url = options["gateway_url"][options["network_id"]]
-    cid32 = cid_to_string(cid)
     url_to_check = f"{gateway_url}/ipfs/{cid32}"
 
     for _ in range(retry_count):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.head(url_to_check, timeout=timeout, allow_redirects=True) as response:
-                    if response.status == 200:
-                        log(f"Block {cid32} already exists on chain, skipping")
-                        return True
-                    if response.status != 404:
-                        raise Exception(f"Unexpected status code {response.status} for {url_to_check}")
+            async with session.head(url_to_check, timeout=timeout, allow_redirects=True) as response:
+                if response.status == 200:
+                    log(f"Block {cid32} already exists on chain, skipping")
+                    return True
+                if response.status != 404:
+                    raise Exception(f"Unexpected status code {response.status} for {url_to_check}")
         except asyncio.TimeoutError:
             log(f"Timeout while checking {url_to_check}")
             continue
         except Exception as e:
             log(f"Error checking block {cid32}: {str(e)}")
             await asyncio.sleep(1)
-    
+
     return False
 
 def split_on_batches(new_blocks: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
     current_batch = []
+    current_bytes = 0
     batches = [current_batch]
     MAX_BATCH_ACTIONS = 7
     MAX_BATCH_BYTES = 256 * 1024
-    
+
     for block in new_blocks:
-        if len(current_batch) >= MAX_BATCH_ACTIONS or sum(len(b['data']) for b in current_batch) >= MAX_BATCH_BYTES:
+        if len(current_batch) >= MAX_BATCH_ACTIONS or current_bytes >= MAX_BATCH_BYTES:
             current_batch = []
+            current_bytes = 0
             batches.append(current_batch)
         current_batch.append(block)
-    
+        current_bytes += len(block['data'])
+
     return batches
 
+def read_file_chunks(file: Dict[str, Any]) -> List[bytes]:
+    if "content" in file:
+        return list(chunk_file(file["content"])) or [b'']
+    chunks = []
+    with open(file["path"], 'rb') as f:
+        while chunk := f.read(CHUNK_SIZE):
+            chunks.append(chunk)
+    return chunks or [b'']
+
 def is_expected_upload_error(e: Exception) -> bool:
     return "Cannot find contract code for account" in str(e) or "Contract method is not found" in str(e)
 
-async def upload_blocks(blocks: List[Dict[str, Any]], account: Account, options: Dict[str, Any] = DEFAULT_OPTIONS) -> None:
+MAX_CONCURRENT_CHECKS = 16
+
+def make_gateway_session() -> aiohttp.ClientSession:
+    # pooled keep-alive connections so repeated gateway requests share
+    # TCP+TLS handshakes and DNS lookups
+    connector = aiohttp.TCPConnector(
+        limit=MAX_CONCURRENT_CHECKS, keepalive_timeout=60, ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connector)
+
+async def upload_blocks(blocks: List[Dict[str, Any]], account: Account, options: Dict[str, Any] = DEFAULT_OPTIONS, session: aiohttp.ClientSession = None) -> None:
     log, status_callback = options["log"], options["status_callback"]
     account_id = options["account_id"]
 
-    THROTTLE_S = 0.025
-    blocks_and_status = []
-    for i, block in enumerate(blocks):
-        await asyncio.sleep(i * THROTTLE_S)
-        uploaded = await is_already_uploaded(block['cid'], account, options)
-        blocks_and_status.append({**block, 'uploaded': uploaded})
-    
-    filtered_blocks = [block for block in blocks_and_status if not block['uploaded']]
+    filtered_blocks = blocks
+    if options.get("skip_existing"):
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_CHECKS)
+
+        async def check(block, session):
+            async with semaphore:
+                return await is_already_uploaded(block['cid_str'], session, options)
+
+        async with contextlib.AsyncExitStack() as stack:
+            if session is None:
+                session = await stack.enter_async_context(make_gateway_session())
+            statuses = await asyncio.gather(*(check(block, session) for block in blocks))
+
+        filtered_blocks = [block for block, uploaded in zip(blocks, statuses) if not uploaded]
+
     batches = split_on_batches(filtered_blocks)
     
     total_blocks = sum(len(batch) for batch in batches)
     current_blocks = 0
-    
-    for batch in batches:
-        try:
-            actions = [
-                create_function_call_action(
-                    'fs_store',
-                    block['data'],  # Pass only the block data
-                    30_000_000_000_000,  # 30 TGas
-                    0
+
+    MAX_CONCURRENT_BATCHES = 4
+    submit_semaphore = asyncio.Semaphore(MAX_CONCURRENT_BATCHES)
+
+    async def submit_batch(batch):
+        nonlocal current_blocks
+        async with submit_semaphore:
+            try:
+                actions = [
+                    create_function_call_action(
+                        'fs_store',
+                        block['data'],  # Pass only the block data
+                        30_000_000_000_000,  # 30 TGas
+                        0
+                    )
+                    for block in batch
+                ]
+
+                outcome = await account.sign_and_submit_tx(
+                    receiver_id=account_id,
+                    actions=actions
                 )
-                for block in batch
-            ]
-
-            outcome = await account.sign_and_submit_tx(
-                receiver_id=account_id,
-                actions=actions
-            )
-            log(f"Transaction hash: {outcome.transaction.hash}")
-        except Exception as e:
-            if not is_expected_upload_error(e):
-                log(f"Error uploading batch: {str(e)}")
-                raise
-        
+                log(f"Transaction hash: {outcome.transaction.hash}")
+            except Exception as e:
+                if not is_expected_upload_error(e):
+                    log(f"Error uploading batch: {str(e)}")
+                    raise
+
         current_blocks += len(batch)
         log(f"Uploaded {current_blocks} / {total_blocks} blocks to NEARFS")
         status_callback(current_blocks, total_blocks)
 
+    # submit the first batch alone: py_near only fetches the access-key nonce
+    # on the first sign_and_submit_tx, and concurrent first calls would all
+    # sign with the same fetched nonce. Once the cache is warm, local
+    # increments keep concurrent submissions collision-free.
+    await submit_batch(batches[0])
+
+    tasks = [asyncio.create_task(submit_batch(batch)) for batch in batches[1:]]
+    try:
+        await asyncio.gather(*tasks)
+    except Exception:
+        # don't leave sibling submissions in flight after a hard failure
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
 async def upload_files(files: List[Dict[str, Any]], options: Dict[str, Any] = DEFAULT_OPTIONS) -> str:
     log = options["log"]
     account_id = options["account_id"]
@@ -116,12 +173,20 @@ async def upload_files(files: List[Dict[str, Any]], options: Dict[str, Any] = DE
         raise ValueError("account_id and private_key must be provided in options")
     
     account = Account(account_id, private_key, rpc_addr=f"https://rpc.{network_id}.near.org")
-    print('upload_files', files, options)
-    
+
     root_dir = {"name": "", "links": []}
     blocks_to_upload = []
 
-    for file in files:
+    # chunk up front so every file becomes independent 256 KB hash jobs;
+    # hashlib releases the GIL for large inputs, so the thread pool runs
+    # them in parallel across cores
+    file_chunks = [read_file_chunks(file) for file in files]
+    hashes = iter(await asyncio.gather(*(
+        asyncio.to_thread(compute_hash, chunk)
+        for chunks in file_chunks for chunk in chunks
+    )))
+
+    for file, chunks in zip(files, file_chunks):
         path = file["name"].split(os.path.sep)
         dir_node = root_dir
         for i in range(len(path) - 1):
@@ -133,31 +198,64 @@ async def upload_files(files: List[Dict[str, Any]], options: Dict[str, Any] = DE
             dir_node = dir_entry
 
         file_name = path[-1]
-        content = file["content"]
-        hash_ = compute_hash(content)
-        cid = pack_cid({'version': 1, 'codec': 0x55, 'hashType': 0x12, 'hash': hash_})
-        file_entry = {"name": file_name, "cid": cid, "size": len(content)}
+        file_size = sum(len(chunk) for chunk in chunks)
+
+        chunk_links = []
+        for chunk in chunks:
+            chunk_cid = pack_cid({'version': 1, 'codec': 0x55, 'hashType': 0x12, 'hash': next(hashes)})
+            blocks_to_upload.append({"data": chunk, "cid": chunk_cid, "cid_str": cid_to_string(chunk_cid)})
+            chunk_links.append({"name": "", "cid": chunk_cid, "size": len(chunk)})
+
+        if len(chunk_links) == 1:
+            # single-chunk file stays a bare raw block, same as before
+            file_entry = {"name": file_name, "cid": chunk_links[0]["cid"], "size": file_size}
+        else:
+            # UnixFS file node linking the chunks
+            pb_node = write_pb_node({
+                "links": chunk_links,
+                "data": write_unixfs_data({
+                    "type": 2,
+                    "fileSize": file_size,
+                    "blockSizes": [len(chunk) for chunk in chunks],
+                }),
+            })
+            cid = pack_cid({'version': 1, 'codec': 0x70, 'hashType': 0x12, 'hash': compute_hash(pb_node)})
+            blocks_to_upload.append({"data": pb_node, "cid": cid, "cid_str": cid_to_string(cid)})
+            file_entry = {"name": file_name, "cid": cid, "size": len(pb_node) + file_size}
+
         dir_node["links"].append(file_entry)
-        blocks_to_upload.append({"data": content, "cid": cid})
-
-    def add_blocks_for_dir(dir_node):
-        for entry in dir_node["links"]:
-            if "links" in entry:
-                entry["cid"] = add_blocks_for_dir(entry)
-        
-        pb_node = write_pb_node({"links": dir_node["links"], "data": b'\x08\x01'})
-        hash_ = compute_hash(pb_node)
+
+    async def add_blocks_for_dir(dir_node):
+        # sibling subtrees are independent, so resolve them concurrently
+        subdirs = [entry for entry in dir_node["links"] if "links" in entry]
+        if subdirs:
+            child_cids = await asyncio.gather(*(add_blocks_for_dir(entry) for entry in subdirs))
+            for entry, child_cid in zip(subdirs, child_cids):
+                entry["cid"] = child_cid
+
+        def build():
+            pb_node = write_pb_node({"links": dir_node["links"], "data": b'\x08\x01'})
+            return pb_node, compute_hash(pb_node)
+
+        pb_node, hash_ = await asyncio.to_thread(build)
         cid = pack_cid({'version': 1, 'codec': 0x70, 'hashType': 0x12, 'hash': hash_})
-        blocks_to_upload.append({"data": pb_node, "cid": cid})
+        blocks_to_upload.append({"data": pb_node, "cid": cid, "cid_str": cid_to_string(cid)})
         return cid
 
-    log("rootDir", root_dir)
-    root_cid = add_blocks_for_dir(root_dir)
+    root_cid = await add_blocks_for_dir(root_dir)
     log("rootCid", cid_to_string(root_cid))
 
-    for block in blocks_to_upload:
-        log("block", cid_to_string(block["cid"]))
+    if options.get("verbose"):
+        log("rootDir", root_dir)
+        for block in blocks_to_upload:
+            log("block", block["cid_str"])
 
-    await upload_blocks(blocks_to_upload, account, options)
+    if options.get("skip_existing"):
+        # one session for the whole upload so every gateway check reuses
+        # the same connections
+        async with make_gateway_session() as session:
+            await upload_blocks(blocks_to_upload, account, options, session=session)
+    else:
+        await upload_blocks(blocks_to_upload, account, options)
 
     return cid_to_string(root_cid)
\ No newline at end of file
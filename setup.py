@@ -0,0 +1,12 @@
+# Builds the optional compiled protobuf helpers. Not required to run the
+# uploader -- ipfs_helpers.py falls back to pure Python when the
+# extension is missing.
+#
+#     pip install cython && python setup.py build_ext --inplace
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name="py-nearfs-upload",
+    ext_modules=cythonize("ipfs_helpers_fast.pyx"),
+)